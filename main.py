@@ -2,22 +2,31 @@
 """
 AMZ-Automation: Fetch data from HubSpot, update Excel, and generate/upload NDAs, Proposals, SOWs, and MSAs to SharePoint.
 """
+import hashlib
 import json
 import os
 import time
 import re
 import io
+import shutil
+import tempfile
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from dotenv import load_dotenv
 from datetime import datetime
+from functools import lru_cache
 from docx import Document
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl
 from docx.text.paragraph import Paragraph
 from docx.table import Table
 import smtplib
+import threading
 from email.mime.text import MIMEText
+from concurrent.futures import ThreadPoolExecutor
 
 # Load environment variables from .env
 load_dotenv()
@@ -87,31 +96,64 @@ BASE_URL            = "https://api.hubapi.com/crm/v3/objects/"
 PROPERTIES_API_URL  = "https://api.hubapi.com/properties/v1"
 EXCEL_PATH          = "ClientData.xlsx"
 
+# Computed once per run; used in every generated filename and date placeholder
+TODAY_STAMP = datetime.now().strftime("%Y%m%d")
+TODAY_ISO   = datetime.now().strftime("%Y-%m-%d")
+
+# Local Parquet cache: much faster to read/write than xlsx, which is only
+# produced as the final export for the SharePoint upload.
+PARQUET_SHEETS = {
+    "Contacts":  "ClientData_Contacts.parquet",
+    "Companies": "ClientData_Companies.parquet",
+    "Deals":     "ClientData_Deals.parquet"
+}
+
 # ─────────────────────────────────────────────────────────────────────────────
 # AUTHENTICATION HELPERS
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Cached Graph token: client-credential tokens live ~60 minutes, so a long
+# run must refresh mid-flight; the lock coalesces concurrent refreshes from
+# worker threads into a single token request.
+_ms_token        = None
+_ms_token_expiry = 0.0
+_ms_token_lock   = threading.Lock()
+
 def get_ms_token():
     """
-    Retrieve a new access token for Microsoft Graph API using client credentials.
-    """
-    token_url = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token"
-    payload = {
-        "grant_type":    "client_credentials",
-        "client_id":     CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "scope":         "https://graph.microsoft.com/.default"
-    }
-    response = requests.post(token_url, data=payload)
-    token = response.json().get("access_token")
-    if token:
-        return token
-    else:
-        raise Exception(f"❌ Failed to authenticate with Microsoft Graph API: {response.json()}")
+    Return a valid access token for Microsoft Graph API, refreshing via
+    client credentials when the cached one is within 60s of expiry.
+    """
+    global _ms_token, _ms_token_expiry
+    if _ms_token and time.time() < _ms_token_expiry - 60:
+        return _ms_token
+    with _ms_token_lock:
+        if _ms_token and time.time() < _ms_token_expiry - 60:
+            return _ms_token
+        token_url = f"https://login.microsoftonline.com/{TENANT_ID}/oauth2/v2.0/token"
+        payload = {
+            "grant_type":    "client_credentials",
+            "client_id":     CLIENT_ID,
+            "client_secret": CLIENT_SECRET,
+            "scope":         "https://graph.microsoft.com/.default"
+        }
+        response = requests.post(token_url, data=payload)
+        data = safe_json(response)
+        token = data.get("access_token")
+        if not token:
+            raise Exception(f"❌ Failed to authenticate with Microsoft Graph API: {data}")
+        _ms_token = token
+        _ms_token_expiry = time.time() + int(data.get("expires_in", 3600))
+        return _ms_token
 
-# Get a fresh MS Graph token and header
-_access_token_ms = get_ms_token()
-HEADERS_MS = {"Authorization": f"Bearer {_access_token_ms}"}
+class GraphAuth(requests.auth.AuthBase):
+    """
+    Attach a current Graph bearer token at send time, so requests made after
+    the original token expires pick up a fresh one transparently.
+    """
+    def __call__(self, r):
+        r.headers["Authorization"] = f"Bearer {get_ms_token()}"
+        return r
 
 # HubSpot headers
 HEADERS_HS = {
@@ -119,15 +161,72 @@ HEADERS_HS = {
     "Content-Type":  "application/json"
 }
 
+def _make_session(headers):
+    """
+    Build a requests.Session with connection pooling and automatic retries,
+    so repeated Graph/HubSpot calls reuse TCP+TLS connections instead of
+    handshaking on every request.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=50,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            allowed_methods=frozenset(["GET", "POST", "PUT", "PATCH"])
+        )
+    )
+    session.mount("https://", adapter)
+    session.headers.update(headers)
+    return session
+
+def safe_json(resp):
+    """
+    Decode a response body as JSON, treating empty or malformed bodies as {}.
+    Keeps .get("results", []) paths from blowing up on a rate-limited or
+    truncated response that slipped past the retry policy. Uses orjson, which
+    decodes large Graph/HubSpot payloads considerably faster than stdlib json.
+    """
+    try:
+        return orjson.loads(resp.content)
+    except orjson.JSONDecodeError:
+        return {}
+
+# Pooled sessions for Microsoft Graph and HubSpot. The Graph session pulls
+# its bearer token per request so long runs survive token expiry.
+SESSION_MS = _make_session({})
+SESSION_MS.auth = GraphAuth()
+SESSION_HS = _make_session(HEADERS_HS)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # UTILITY FUNCTIONS
 # ─────────────────────────────────────────────────────────────────────────────
 
-def clean_data(value):
-    """
-    Return 'N/A' if value is None or empty, else return the value.
-    """
-    return value if value else "N/A"
+# Low-cardinality status/type columns: category dtype stores a small integer
+# code per cell instead of a full Python string, which cuts peak memory
+# during the merge and speeds up the dedup/groupby work downstream.
+CATEGORY_COLUMNS = (
+    "contact_type", "nda_status", "msa_status", "sow_status",
+    "proposal_status", "proposal___service_line",
+    "state_list", "hs_lead_status", "lead_source", "type"
+)
+
+def records_to_frame(records, fields):
+    """
+    Build a DataFrame straight from HubSpot 'properties' dicts, letting
+    pandas fill missing/empty values with 'N/A' vectorized instead of
+    running a Python-level cleanup per cell.
+    """
+    df = pd.DataFrame.from_records([r["properties"] for r in records])
+    df = df.reindex(columns=fields)
+    df = df.fillna("N/A").replace("", "N/A")
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
 
 def send_error_email(subject, message):
     """
@@ -160,7 +259,7 @@ def update_lead_source_for_contact(contact_id):
     """
     url = f"https://api.hubapi.com/crm/v3/objects/contacts/{contact_id}"
     payload = {"properties": {"lead_source": "Website Contact Form"}}
-    resp = requests.patch(url, headers=HEADERS_HS, json=payload)
+    resp = SESSION_HS.patch(url, json=payload)
     if resp.status_code != 200:
         send_error_email("Lead Source Update Failed", resp.text)
     else:
@@ -168,8 +267,11 @@ def update_lead_source_for_contact(contact_id):
 
 def update_lead_source_for_website_contacts(contacts):
     """
-    For all contacts, if 'message' exists and is not empty, set lead_source to 'Website Contact Form'.
+    For all contacts, if 'message' exists and is not empty, set lead_source
+    to 'Website Contact Form' — one batch round-trip per 100 contacts
+    instead of one PATCH each.
     """
+    inputs = []
     for c in contacts:
         contact_id = c.get("id")
         properties = c.get("properties", {})
@@ -177,7 +279,13 @@ def update_lead_source_for_website_contacts(contacts):
         lead_source = properties.get("lead_source", "")
         # Only update if message is non-empty and lead_source is not already set correctly
         if message and lead_source != "Website Contact Form":
-            update_lead_source_for_contact(contact_id)
+            inputs.append({
+                "id": contact_id,
+                "properties": {"lead_source": "Website Contact Form"}
+            })
+    if inputs:
+        hubspot_batch_update("contacts", inputs)
+        print(f"✅ Updated Lead Source for {len(inputs)} contact(s)")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -193,7 +301,7 @@ def get_existing_asana_projects(team_gid):
     url = f"https://app.asana.com/api/1.0/teams/{team_gid}/projects?archived=false"
     res = requests.get(url, headers=ASANA_HEADERS)
     if res.status_code == 200:
-        return set(project["name"] for project in res.json().get("data", []))
+        return set(project["name"] for project in safe_json(res).get("data", []))
     else:
         print("❌ Failed to fetch Asana projects:", res.text)
         return set()
@@ -219,11 +327,11 @@ def create_asana_project(project_name, workspace_gid, team_gid, existing_project
 def sync_closed_won_deals_to_asana():
     print("🔄 Fetching Closed-Won deals from HubSpot...")
     url = "https://api.hubapi.com/crm/v3/objects/deals?properties=dealname,dealstage&limit=100"
-    res = requests.get(url, headers=HEADERS_HS)
+    res = SESSION_HS.get(url)
     if res.status_code != 200:
         print("❌ HubSpot API error:", res.text)
         return
-    deals = res.json().get("results", [])
+    deals = safe_json(res).get("results", [])
     existing_projects = get_existing_asana_projects(ASANA_TEAM_ID)
     for deal in deals:
         deal_name = deal["properties"].get("dealname", "Untitled Deal")
@@ -245,71 +353,101 @@ def iter_block_items(parent):
         elif isinstance(child, CT_Tbl):
             yield Table(child, parent)
 
-def replace_placeholder(paragraph, replacements):
+def compile_placeholder_pattern(replacements):
+    """
+    Compile a single alternation pattern matching every placeholder key, so
+    each paragraph is scanned once instead of once per key.
+    """
+    return re.compile("|".join(re.escape(key) for key in replacements))
+
+def replace_placeholder(paragraph, replacements, pattern=None):
     """
     Fully replace all placeholders in paragraph, even if broken across multiple runs.
+    Runs are only rewritten when something actually matched.
     """
+    if pattern is None:
+        pattern = compile_placeholder_pattern(replacements)
     full_text = "".join(run.text for run in paragraph.runs)
-    for key, val in replacements.items():
-        full_text = full_text.replace(key, str(val) if val is not None else "")
+    new_text = pattern.sub(
+        lambda m: str(replacements[m.group(0)]) if replacements[m.group(0)] is not None else "",
+        full_text
+    )
+    if new_text == full_text:
+        return
     for i, run in enumerate(paragraph.runs):
         if i == 0:
-            run.text = full_text
+            run.text = new_text
         else:
             run.text = ""
 
-def replace_placeholders_in_document(doc, replacements):
+def iter_paragraphs(container):
     """
-    Apply replace_placeholder() to every paragraph and table cell in entire document
-    including paragraphs, tables, headers, footers.
+    Yield every paragraph in a container (document body, header, footer or
+    table cell), recursing into table cells so nested tables are covered too.
     """
-    # Body paragraphs
-    for p in doc.paragraphs:
-        replace_placeholder(p, replacements)
-
-    # Tables in body
-    for table in doc.tables:
+    for p in container.paragraphs:
+        yield p
+    for table in container.tables:
         for row in table.rows:
             for cell in row.cells:
-                for p in cell.paragraphs:
-                    replace_placeholder(p, replacements)
+                yield from iter_paragraphs(cell)
 
-    # Headers
-    for section in doc.sections:
-        for p in section.header.paragraphs:
-            replace_placeholder(p, replacements)
-        for table in section.header.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for p in cell.paragraphs:
-                        replace_placeholder(p, replacements)
-
-    # Footers
+def replace_placeholders_in_document(doc, replacements):
+    """
+    Apply replace_placeholder() to every paragraph in the document — body,
+    tables, headers and footers — in one fused walk.
+    The placeholder pattern is compiled once and shared across all paragraphs;
+    paragraphs without any placeholder (the common case) are skipped outright.
+    """
+    pattern = compile_placeholder_pattern(replacements)
+    containers = [doc]
     for section in doc.sections:
-        for p in section.footer.paragraphs:
-            replace_placeholder(p, replacements)
-        for table in section.footer.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for p in cell.paragraphs:
-                        replace_placeholder(p, replacements)
+        containers.append(section.header)
+        containers.append(section.footer)
+    for container in containers:
+        for p in iter_paragraphs(container):
+            # "{" rules out most body text before the regex even runs
+            if "{" in p.text and pattern.search(p.text):
+                replace_placeholder(p, replacements, pattern)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
 # HUBSPOT PROPERTY FETCHING
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Property schemas change rarely, so cache them on disk between runs
+# (default 24h, override via PROPERTIES_TTL_SECONDS).
+PROPERTIES_CACHE_DIR   = os.path.join(os.path.expanduser("~"), ".cache", "amz")
+PROPERTIES_TTL_SECONDS = int(os.getenv("PROPERTIES_TTL_SECONDS", "86400"))
+
 def get_all_properties(object_type):
     """
     Fetch all available fields (properties) for a given HubSpot object type.
+    Reads from the local cache when it is fresher than PROPERTIES_TTL_SECONDS,
+    skipping the HTTP round trip on routine reruns.
     """
+    cache_path = os.path.join(PROPERTIES_CACHE_DIR, f"properties_{object_type}.json")
+    try:
+        if time.time() - os.path.getmtime(cache_path) < PROPERTIES_TTL_SECONDS:
+            with open(cache_path) as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass  # missing or unreadable cache — fall through to the API
+
     url = f"{PROPERTIES_API_URL}/{object_type}/properties"
-    response = requests.get(url, headers=HEADERS_HS)
+    response = SESSION_HS.get(url)
     if response.status_code == 200:
-        properties = response.json()
-        return [prop["name"] for prop in properties]
+        properties = safe_json(response)
+        names = [prop["name"] for prop in properties]
+        try:
+            os.makedirs(PROPERTIES_CACHE_DIR, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump(names, f)
+        except OSError as e:
+            print(f"⚠️ Could not write properties cache for {object_type}: {e}")
+        return names
     else:
-        print(f"❌ Failed to fetch properties for {object_type}: {response.json()}")
+        print(f"❌ Failed to fetch properties for {object_type}: {safe_json(response)}")
         return []
 
 # Retrieve all fields dynamically
@@ -331,9 +469,9 @@ def fetch_all_hubspot_data(object_type, fields):
     has_more = True
 
     while has_more:
-        response = requests.get(url, headers=HEADERS_HS)
+        response = SESSION_HS.get(url)
         if response.status_code == 200:
-            data = response.json()
+            data = safe_json(response)
             all_records.extend(data.get("results", []))
             paging = data.get("paging", {})
             next_page = paging.get("next", {}).get("after")
@@ -342,21 +480,136 @@ def fetch_all_hubspot_data(object_type, fields):
             else:
                 has_more = False
         else:
-            print(f"❌ Failed to fetch {object_type}: {response.json()}")
+            print(f"❌ Failed to fetch {object_type}: {safe_json(response)}")
             break
 
     return all_records
 
+# ─────────────────────────────────────────────────────────────────────────────
+# HUBSPOT BATCH READ HELPERS
+# ─────────────────────────────────────────────────────────────────────────────
+
+def hubspot_batch_read(object_type, ids, properties):
+    """
+    Read records via the CRM batch-read endpoint (100 IDs per request).
+    Returns {record_id: properties_dict}.
+    """
+    results = {}
+    ids = [str(i) for i in ids if i]
+    for start in range(0, len(ids), 100):
+        chunk = ids[start:start + 100]
+        resp = SESSION_HS.post(
+            f"{BASE_URL}{object_type}/batch/read",
+            json={"properties": list(properties), "inputs": [{"id": i} for i in chunk]}
+        )
+        if resp.status_code != 200:
+            print(f"❌ Batch read failed for {object_type}: {resp.text}")
+            continue
+        for rec in safe_json(resp).get("results", []):
+            results[str(rec["id"])] = rec.get("properties", {})
+    return results
+
+def hubspot_batch_read_associations(from_type, to_type, ids):
+    """
+    Resolve from→to association edges via the v4 batch endpoint (100 IDs per
+    request). Returns {from_id: [to_id, ...]}; IDs with no association map to [].
+    """
+    edges = {}
+    ids = [str(i) for i in ids if i]
+    for start in range(0, len(ids), 100):
+        chunk = ids[start:start + 100]
+        resp = SESSION_HS.post(
+            f"https://api.hubapi.com/crm/v4/associations/{from_type}/{to_type}/batch/read",
+            json={"inputs": [{"id": i} for i in chunk]}
+        )
+        if resp.status_code != 200:
+            print(f"❌ Batch association read failed for {from_type}→{to_type}: {resp.text}")
+            continue
+        for i in chunk:
+            edges[i] = []
+        for rec in safe_json(resp).get("results", []):
+            from_id = str(rec.get("from", {}).get("id"))
+            edges[from_id] = [str(t["toObjectId"]) for t in rec.get("to", [])]
+    return edges
+
+def hubspot_batch_update(object_type, inputs):
+    """
+    Apply property updates via the batch-update endpoint (100 records per
+    request). `inputs` is a list of {"id": ..., "properties": {...}} dicts.
+    """
+    url = f"https://api.hubapi.com/crm/v3/objects/{object_type}/batch/update"
+    for i in range(0, len(inputs), 100):
+        resp = SESSION_HS.post(url, json={"inputs": inputs[i:i + 100]})
+        if resp.status_code not in (200, 207):
+            send_error_email(f"Batch Update Failed ({object_type})", resp.text)
+
+# Prefetched lookups so the per-deal generators read from memory instead of
+# issuing one GET per entity. Populated by prefetch_proposal_data(); the
+# fetch_* helpers below fall back to single GETs for anything missing.
+_deal_company_cache    = {}
+_company_props_cache   = {}
+_company_contact_cache = {}
+
+def prefetch_proposal_data(deals):
+    """
+    Batch-resolve deal→company edges, company properties and primary contacts
+    for a list of deals, collapsing O(N) per-entity GETs into O(N/100) POSTs.
+    """
+    # Dedupe while keeping order — a deal may need both a proposal and a SOW
+    deal_ids = list(dict.fromkeys(d["id"] for d in deals))
+    _deal_company_cache.update(hubspot_batch_read_associations("deals", "companies", deal_ids))
+
+    company_ids = {ids[0] for ids in _deal_company_cache.values() if ids}
+    _company_props_cache.update(hubspot_batch_read(
+        "companies", company_ids,
+        ["name", "legal_entity_name", "city", "state_list", "zip", "address"]
+    ))
+
+    contact_edges = hubspot_batch_read_associations("companies", "contacts", company_ids)
+    contact_ids = {ids[0] for ids in contact_edges.values() if ids}
+    contact_props = hubspot_batch_read("contacts", contact_ids, ["firstname", "lastname", "email"])
+    for company_id, assoc_ids in contact_edges.items():
+        _company_contact_cache[company_id] = contact_props.get(assoc_ids[0], {}) if assoc_ids else {}
+
+_company_msa_contact_cache = {}
+
+def prefetch_msa_data(companies):
+    """
+    Batch-resolve company→contact edges and the MSA contact properties for
+    the MSA loop, replacing two GETs per company with O(N/100) POSTs.
+    """
+    company_ids = [c["id"] for c in companies]
+    contact_edges = hubspot_batch_read_associations("companies", "contacts", company_ids)
+    contact_ids = {ids[0] for ids in contact_edges.values() if ids}
+    contact_props = hubspot_batch_read(
+        "contacts", contact_ids,
+        ["firstname", "lastname", "email", "jobtitle", "msa_status"]
+    )
+    for company_id, assoc_ids in contact_edges.items():
+        if assoc_ids and assoc_ids[0] in contact_props:
+            props = dict(contact_props[assoc_ids[0]])
+            props["id"] = assoc_ids[0]
+            _company_msa_contact_cache[company_id] = props
+        else:
+            _company_msa_contact_cache[company_id] = {}
+
 # ─────────────────────────────────────────────────────────────────────────────
 # LOAD & UPDATE EXCEL (ClientData.xlsx)
 # ─────────────────────────────────────────────────────────────────────────────
 
 def load_existing_data(file_path):
     """
-    Load existing ClientData.xlsx (all sheets). If not found, return None.
+    Load the existing ClientData cache (all sheets). Prefers the Parquet
+    cache files over the xlsx; if neither exists, return None.
     """
+    if all(os.path.exists(path) for path in PARQUET_SHEETS.values()):
+        existing_data = {sheet: pd.read_parquet(path) for sheet, path in PARQUET_SHEETS.items()}
+        print("📂 Existing data loaded from Parquet cache.")
+        return existing_data
     try:
-        existing_data = pd.read_excel(file_path, sheet_name=None)
+        existing_data = pd.read_excel(
+            file_path, sheet_name=list(PARQUET_SHEETS), engine="calamine"
+        )
         print("📂 Existing data loaded.")
         return existing_data
     except FileNotFoundError:
@@ -372,7 +625,12 @@ def update_or_append_data(existing_data, new_data, unique_field):
     if existing_data is not None:
         existing_df = existing_data  # already a DataFrame, no need to convert
         if unique_field in existing_df.columns:
-            merged_df = pd.concat([existing_df, new_data]).drop_duplicates(subset=[unique_field], keep="last")
+            # Hash-join on the unique field instead of concatenating both
+            # frames and deduplicating the doubled result: new rows win on
+            # overlap, existing-only rows survive.
+            new_idx = new_data.drop_duplicates(subset=[unique_field], keep="last").set_index(unique_field)
+            existing_idx = existing_df.drop_duplicates(subset=[unique_field], keep="last").set_index(unique_field)
+            merged_df = new_idx.combine_first(existing_idx).reset_index()
         else:
             print(f"⚠️ Unique field '{unique_field}' not found in existing data. Appending all records.")
             merged_df = pd.concat([existing_df, new_data])
@@ -381,21 +639,23 @@ def update_or_append_data(existing_data, new_data, unique_field):
 
     return merged_df
 
-# Fetch all HubSpot data
-contacts = fetch_all_hubspot_data("contacts", CONTACT_FIELDS)
-update_lead_source_for_website_contacts(contacts)   # <--- add here!
+# Fetch all HubSpot data — the three object types are independent, so fetch
+# them concurrently instead of paying for three paginated walks back-to-back.
+with ThreadPoolExecutor(max_workers=3) as _fetch_pool:
+    _contacts_future  = _fetch_pool.submit(fetch_all_hubspot_data, "contacts",  CONTACT_FIELDS)
+    _companies_future = _fetch_pool.submit(fetch_all_hubspot_data, "companies", COMPANY_FIELDS)
+    _deals_future     = _fetch_pool.submit(fetch_all_hubspot_data, "deals",     DEAL_FIELDS)
 
-companies = fetch_all_hubspot_data("companies", COMPANY_FIELDS)
-deals    = fetch_all_hubspot_data("deals", DEAL_FIELDS)
+contacts  = _contacts_future.result()
+companies = _companies_future.result()
+deals     = _deals_future.result()
 
-# Clean and convert to DataFrames
-cleaned_contacts  = [{key: clean_data(c["properties"].get(key)) for key in CONTACT_FIELDS} for c in contacts]
-cleaned_companies = [{key: clean_data(c["properties"].get(key)) for key in COMPANY_FIELDS} for c in companies]
-cleaned_deals     = [{key: clean_data(d["properties"].get(key)) for key in DEAL_FIELDS} for d in deals]
+update_lead_source_for_website_contacts(contacts)   # <--- add here!
 
-contacts_df  = pd.DataFrame(cleaned_contacts)
-companies_df = pd.DataFrame(cleaned_companies)
-deals_df     = pd.DataFrame(cleaned_deals)
+# Clean and convert to DataFrames
+contacts_df  = records_to_frame(contacts,  CONTACT_FIELDS)
+companies_df = records_to_frame(companies, COMPANY_FIELDS)
+deals_df     = records_to_frame(deals,     DEAL_FIELDS)
 
 # Load and merge with existing Excel
 existing_data = load_existing_data(EXCEL_PATH)
@@ -403,35 +663,98 @@ contacts_df  = update_or_append_data(existing_data.get("Contacts")  if existing_
 companies_df = update_or_append_data(existing_data.get("Companies") if existing_data else None, companies_df, "name")
 deals_df     = update_or_append_data(existing_data.get("Deals")     if existing_data else None, deals_df,     "dealname")
 
-# Save updated Excel
-with pd.ExcelWriter(EXCEL_PATH) as writer:
-    contacts_df.to_excel(writer, sheet_name="Contacts", index=False)
-    companies_df.to_excel(writer, sheet_name="Companies", index=False)
-    deals_df.to_excel(writer, sheet_name="Deals", index=False)
-
-print("✅ ClientData.xlsx updated: new and existing data merged.")
+# Content hash over all three frames — when nothing changed since the last
+# run, the xlsx rewrite and the SharePoint re-upload are both skipped.
+CLIENTDATA_HASH_PATH = ".clientdata.hash"
+_sig = hashlib.blake2b()
+for _df in (contacts_df, companies_df, deals_df):
+    _sig.update(pd.util.hash_pandas_object(_df, index=False).values.tobytes())
+clientdata_hash = _sig.hexdigest()
+try:
+    with open(CLIENTDATA_HASH_PATH) as _f:
+        clientdata_changed = _f.read().strip() != clientdata_hash
+except OSError:
+    clientdata_changed = True
+
+if clientdata_changed:
+    # Save the fast Parquet cache, then the xlsx export for SharePoint
+    contacts_df.to_parquet(PARQUET_SHEETS["Contacts"], compression="zstd")
+    companies_df.to_parquet(PARQUET_SHEETS["Companies"], compression="zstd")
+    deals_df.to_parquet(PARQUET_SHEETS["Deals"], compression="zstd")
+
+    # xlsxwriter is much faster than openpyxl here. Its constant_memory mode
+    # is NOT safe with to_excel: pandas writes cells column-by-column and
+    # constant_memory silently discards writes to already-flushed rows,
+    # leaving every column after the first blank.
+    with pd.ExcelWriter(EXCEL_PATH, engine="xlsxwriter") as writer:
+        contacts_df.to_excel(writer, sheet_name="Contacts", index=False)
+        companies_df.to_excel(writer, sheet_name="Companies", index=False)
+        deals_df.to_excel(writer, sheet_name="Deals", index=False)
+
+    print("✅ ClientData.xlsx updated: new and existing data merged.")
+else:
+    print("⏩ ClientData unchanged since last run — skipping rewrite and upload.")
 
 # ─────────────────────────────────────────────────────────────────────────────
 # UPLOAD UPDATED EXCEL TO ONE DRIVE / SHAREPOINT
 # ─────────────────────────────────────────────────────────────────────────────
 
+GRAPH_SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024   # Graph requires an upload session above 4MB
+GRAPH_UPLOAD_CHUNK_SIZE   = 10 * 320 * 1024   # upload-session chunks must be 320KB-aligned
+
 def upload_file_to_onedrive(file_path):
     """
     Upload ClientData.xlsx to OneDrive under the SharePoint site.
+    Files over 4MB go through a Graph upload session in 320KB-aligned chunks
+    (required by Graph, and avoids holding the whole file in memory); smaller
+    files keep the single-PUT path. Returns True on success.
     """
     file_name = os.path.basename(file_path)
-    upload_url = (
+    file_size = os.path.getsize(file_path)
+    base_item_url = (
         f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{CLIENTS_FOLDER_ID}:/{file_name}:/content"
+        f"/drive/items/{CLIENTS_FOLDER_ID}:/{file_name}:"
     )
-    with open(file_path, "rb") as f:
-        response = requests.put(upload_url, headers=HEADERS_MS, data=f)
-    if response.status_code in [200, 201]:
-        print(f"✅ {file_name} uploaded successfully to OneDrive!")
-    else:
-        print(f"❌ Failed to upload {file_name}: {response.json()}")
 
-upload_file_to_onedrive(EXCEL_PATH)
+    if file_size <= GRAPH_SIMPLE_UPLOAD_LIMIT:
+        with open(file_path, "rb") as f:
+            response = SESSION_MS.put(f"{base_item_url}/content", data=f)
+        if response.status_code in [200, 201]:
+            print(f"✅ {file_name} uploaded successfully to OneDrive!")
+            return True
+        print(f"❌ Failed to upload {file_name}: {safe_json(response)}")
+        return False
+
+    session_resp = SESSION_MS.post(f"{base_item_url}/createUploadSession", json={})
+    if session_resp.status_code not in [200, 201]:
+        print(f"❌ Failed to create upload session for {file_name}: {safe_json(session_resp)}")
+        return False
+    upload_url = safe_json(session_resp)["uploadUrl"]
+    with open(file_path, "rb") as f:
+        offset = 0
+        while offset < file_size:
+            chunk = f.read(GRAPH_UPLOAD_CHUNK_SIZE)
+            end = offset + len(chunk) - 1
+            # Upload-session URLs are pre-authenticated; no auth header needed.
+            response = requests.put(
+                upload_url,
+                headers={"Content-Range": f"bytes {offset}-{end}/{file_size}"},
+                data=chunk
+            )
+            if response.status_code not in [200, 201, 202]:
+                print(f"❌ Failed to upload {file_name}: {safe_json(response)}")
+                return False
+            offset = end + 1
+    print(f"✅ {file_name} uploaded successfully to OneDrive!")
+    return True
+
+# Record the content hash only once the workbook is actually on SharePoint;
+# otherwise a failed upload would make every later run skip as "unchanged"
+# while the remote copy stays stale.
+if clientdata_changed:
+    if upload_file_to_onedrive(EXCEL_PATH):
+        with open(CLIENTDATA_HASH_PATH, "w") as _f:
+            _f.write(clientdata_hash)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # CREATE CLIENT FOLDERS & COPY SUBFOLDERS
@@ -440,18 +763,34 @@ upload_file_to_onedrive(EXCEL_PATH)
 def download_company_data_sheet():
     """
     Download ClientData.xlsx from SharePoint and return the 'Companies' sheet as a DataFrame.
+    The response is streamed to a temp file so the workbook is never held in
+    memory twice (raw bytes + BytesIO copy).
     """
     url = (
         f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
         f"/drive/items/{CLIENT_DATA_FILE_ID}/content"
     )
-    response = requests.get(url, headers=HEADERS_MS)
-    if response.status_code == 200:
-        file_stream = io.BytesIO(response.content)
-        return pd.read_excel(file_stream, sheet_name="Companies")
-    else:
-        print(f"❌ Failed to download ClientData.xlsx: {response.json()}")
-        return None
+    with SESSION_MS.get(url, stream=True) as response:
+        if response.status_code != 200:
+            print(f"❌ Failed to download ClientData.xlsx: {safe_json(response)}")
+            return None
+        with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as tmp:
+            shutil.copyfileobj(response.raw, tmp)
+            tmp_path = tmp.name
+    try:
+        # Only name/type are used downstream; calamine parses just the
+        # requested sheet instead of the whole workbook.
+        return pd.read_excel(
+            tmp_path, sheet_name="Companies", engine="calamine",
+            usecols=["name", "type"]
+        )
+    finally:
+        os.unlink(tmp_path)
+
+# Deletion table for the "hard" illegal chars plus comma, applied in one
+# C-level pass instead of a character-class regex per call.
+_SANITIZE_TABLE = str.maketrans("", "", '\\/:*?"<>|#{}%~&,')
+_WS_RE = re.compile(r'\s+')
 
 def sanitize_folder_name(name: str) -> str:
     """
@@ -461,64 +800,165 @@ def sanitize_folder_name(name: str) -> str:
       • Trim leading/trailing spaces,
       • Strip any trailing dot.
     """
-    # 1) Remove "hard" illegal chars plus comma
-    cleaned = re.sub(r'[\\/:*?"<>|#{}%~&,]', '', name)
+    return _WS_RE.sub(' ', name.translate(_SANITIZE_TABLE)).strip().rstrip('.')
 
-    # 2) Collapse any run of whitespace into a single space
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+# Memoized folder listings: the document generators each re-listed the same
+# parent folders once per company/deal to find a child by name. Writes are
+# guarded by a lock since the generators run on worker threads.
+_children_cache = {}
+_children_cache_lock = threading.Lock()
 
-    # 3) If it ends with a dot, strip it off
-    cleaned = cleaned.rstrip('.')
+def list_children(folder_id):
+    """
+    Return {name: item_id} for a folder's children, fetched from Graph once
+    per folder and memoized for the rest of the run.
+    """
+    cached = _children_cache.get(folder_id)
+    if cached is not None:
+        return cached
+    url = (
+        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{folder_id}/children"
+        "?$select=id,name&$top=999"
+    )
+    resp = SESSION_MS.get(url)
+    items = safe_json(resp).get("value", []) if resp.status_code == 200 else []
+    listing = {item["name"]: item["id"] for item in items}
+    with _children_cache_lock:
+        return _children_cache.setdefault(folder_id, listing)
 
-    return cleaned
+def invalidate_children(folder_id):
+    """
+    Drop the memoized listing for a folder after writing into it, so the next
+    list_children() call sees the new item.
+    """
+    with _children_cache_lock:
+        _children_cache.pop(folder_id, None)
 
-def get_or_create_company_folder(company_name, company_type):
+# Template bytes, downloaded once per run. Rendering locally from these and
+# PUT-ing the result into the destination folder replaces the whole
+# copy → poll monitor → download sequence per generated document.
+_template_bytes_cache = {}
+_template_bytes_lock = threading.Lock()
+
+def get_template_bytes(template_id):
     """
-    Create a folder for the company in the correct parent folder based on type.
-    Returns the folder ID and a flag indicating if subfolders should be created (True for clients, False for vendors/partners).
+    Return a template's raw .docx bytes, downloading them from SharePoint at
+    most once per run. Bytes are also kept on disk keyed by the item's eTag
+    (same cache directory as the property schemas), so reruns skip the
+    download entirely while the template is unchanged on SharePoint.
+    Returns None if the download fails.
     """
-    safe_name = sanitize_folder_name(company_name)
-    if company_type.strip().lower() in ["vendor", "partner"]:
-        parent_id = VENDORS_PARTNERS_FOLDER_ID
-        allow_subfolders = False
-    else:
-        parent_id = CLIENTS_FOLDER_ID
-        allow_subfolders = True
-    url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{parent_id}/children"
-    response = requests.get(url, headers=HEADERS_MS)
-    if response.status_code == 200:
-        folders = response.json().get("value", [])
-        for folder in folders:
-            if folder["name"] == safe_name:
-                return folder["id"], allow_subfolders
-    # Create new folder
-    create_url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{parent_id}/children"
-    payload = {
-        "name": safe_name,
-        "folder": {},
-        "@microsoft.graph.conflictBehavior": "fail"
-    }
-    create_resp = requests.post(create_url, headers=HEADERS_MS, json=payload)
-    if create_resp.status_code == 201:
-        return create_resp.json()["id"], allow_subfolders
-    else:
-        print(f"❌ Failed to create folder '{safe_name}': {create_resp.json()}")
-        return None, allow_subfolders
+    cached = _template_bytes_cache.get(template_id)
+    if cached is not None:
+        return cached
+
+    meta_url = (
+        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
+        f"/drive/items/{template_id}?$select=id,eTag"
+    )
+    meta_resp = SESSION_MS.get(meta_url)
+    etag = safe_json(meta_resp).get("eTag") if meta_resp.status_code == 200 else None
+
+    os.makedirs(PROPERTIES_CACHE_DIR, exist_ok=True)
+    blob_path = os.path.join(PROPERTIES_CACHE_DIR, f"template_{template_id}.docx")
+    etag_path = blob_path + ".etag"
+    if etag and os.path.exists(blob_path) and os.path.exists(etag_path):
+        with open(etag_path) as fh:
+            stored_etag = fh.read()
+        if stored_etag == etag:
+            with open(blob_path, "rb") as fh:
+                data = fh.read()
+            with _template_bytes_lock:
+                return _template_bytes_cache.setdefault(template_id, data)
+
+    url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{template_id}/content"
+    resp = SESSION_MS.get(url)
+    if resp.status_code != 200:
+        print(f"❌ Failed to download template {template_id}: {resp.text}")
+        return None
+    if etag:
+        with open(blob_path, "wb") as fh:
+            fh.write(resp.content)
+        with open(etag_path, "w") as fh:
+            fh.write(etag)
+    with _template_bytes_lock:
+        return _template_bytes_cache.setdefault(template_id, resp.content)
+
+def batch_create_folders(parent_id, folder_names):
+    """
+    Create folders under a parent via the Graph $batch endpoint, 20
+    subrequests per call instead of one POST per folder.
+    Returns {name: folder_id} for the folders that were created.
+    """
+    created = {}
+    names = list(folder_names)
+    for start in range(0, len(names), 20):
+        chunk = names[start:start + 20]
+        batch_payload = {
+            "requests": [
+                {
+                    "id": str(i + 1),
+                    "method": "POST",
+                    "url": f"/sites/{SHAREPOINT_SITE_ID}/drive/items/{parent_id}/children",
+                    "headers": {"Content-Type": "application/json"},
+                    "body": {
+                        "name": name,
+                        "folder": {},
+                        "@microsoft.graph.conflictBehavior": "fail"
+                    }
+                }
+                for i, name in enumerate(chunk)
+            ]
+        }
+        resp = SESSION_MS.post(f"{GRAPH_API_BASE_URL}/$batch", json=batch_payload)
+        if resp.status_code != 200:
+            print(f"❌ Folder $batch request failed: {resp.text}")
+            continue
+        for sub in safe_json(resp).get("responses", []):
+            if sub.get("status") == 201:
+                body = sub.get("body", {})
+                created[body.get("name")] = body.get("id")
+            else:
+                idx = int(sub.get("id", "1")) - 1
+                print(f"❌ Failed to create folder '{chunk[idx]}': {sub.get('body')}")
+    if created:
+        invalidate_children(parent_id)
+    return created
 
 # Update the main folder creation loop
 companies_df = download_company_data_sheet()
 if companies_df is None:
     raise Exception("❌ Unable to load company data!")
 
-company_names = companies_df["name"].dropna().unique().tolist()
 client_folders = {}
 
-for idx, row in companies_df.iterrows():
-    name = row.get("name")
-    ctype = str(row.get("type", "")).strip()
+# Classify each company once, then diff against the existing listings and
+# create only the missing folders in $batch calls of 20.
+company_rows = []
+_company_sub = companies_df[["name", "type"]].copy()
+_company_sub["type"] = _company_sub["type"].fillna("")
+_company_sub = _company_sub[_company_sub["name"].notna()]
+for name, ctype in _company_sub.itertuples(index=False, name=None):
+    ctype = str(ctype).strip()
     if not name:
         continue
-    folder_id, allow_subfolders = get_or_create_company_folder(name, ctype)
+    if ctype.lower() in ["vendor", "partner"]:
+        parent_id, allow_subfolders = VENDORS_PARTNERS_FOLDER_ID, False
+    else:
+        parent_id, allow_subfolders = CLIENTS_FOLDER_ID, True
+    company_rows.append((name, sanitize_folder_name(name), parent_id, allow_subfolders))
+
+for target_parent_id in (CLIENTS_FOLDER_ID, VENDORS_PARTNERS_FOLDER_ID):
+    existing = list_children(target_parent_id)
+    missing = dict.fromkeys(
+        safe_name for (_, safe_name, parent_id, _) in company_rows
+        if parent_id == target_parent_id and safe_name not in existing
+    )
+    if missing:
+        batch_create_folders(target_parent_id, missing)
+
+for name, safe_name, parent_id, allow_subfolders in company_rows:
+    folder_id = list_children(parent_id).get(safe_name)
     if folder_id:
         client_folders[name] = {"id": folder_id, "allow_subfolders": allow_subfolders}
 
@@ -528,26 +968,51 @@ print("📂 All company folders created:", client_folders)
 # NDA GENERATION
 # ─────────────────────────────────────────────────────────────────────────────
 
+def wait_for_copy(copy_resp, timeout=30):
+    """
+    Poll the monitor URL returned by a Graph /copy request until the copy
+    completes, returning the new item's ID (or None on failure/timeout).
+    Most copies finish well under a second, so this replaces fixed sleeps
+    and the follow-up children listing used to find the copied item.
+    """
+    monitor_url = copy_resp.headers.get("Location")
+    if not monitor_url:
+        return None
+    delay = 0.2
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        # Monitor URLs are pre-authenticated; Graph rejects them with an auth header.
+        status = safe_json(requests.get(monitor_url))
+        if status.get("status") == "completed":
+            return status.get("resourceId")
+        if status.get("status") == "failed":
+            return None
+        time.sleep(delay)
+        delay = min(delay * 2, 2.0)
+    return None
+
 def fetch_primary_contact_nda(company_id):
     """
     Fetch the primary contact for a company, return properties including id, firstname, lastname, email, jobtitle, nda_status, contact_type.
     """
     assoc_url = f"https://api.hubapi.com/crm/v3/objects/companies/{company_id}/associations/contacts"
-    assoc_resp = requests.get(assoc_url, headers=HEADERS_HS)
+    assoc_resp = SESSION_HS.get(assoc_url)
     if assoc_resp.status_code != 200:
         return None
-    for contact in assoc_resp.json().get("results", []):
-        contact_id = contact.get("id")
-        contact_url = (
-            f"https://api.hubapi.com/crm/v3/objects/contacts/{contact_id}"
-            "?properties=firstname,lastname,email,jobtitle,hs_lead_status,contact_type,nda_status"
-        )
-        contact_resp = requests.get(contact_url, headers=HEADERS_HS)
-        if contact_resp.status_code == 200:
-            props = contact_resp.json().get("properties", {})
-            if props.get("firstname") and props.get("lastname"):
-                props["id"] = contact_id
-                return props
+    contact_ids = [c.get("id") for c in safe_json(assoc_resp).get("results", []) if c.get("id")]
+    if not contact_ids:
+        return None
+    # One batch read for all associated contacts instead of a GET per contact
+    contacts_by_id = hubspot_batch_read(
+        "contacts",
+        contact_ids,
+        ["firstname", "lastname", "email", "jobtitle", "hs_lead_status", "contact_type", "nda_status"]
+    )
+    for contact_id in contact_ids:
+        props = contacts_by_id.get(str(contact_id), {})
+        if props.get("firstname") and props.get("lastname"):
+            props["id"] = contact_id
+            return props
     return None
 
 def update_contact_nda_status(contact_id):
@@ -556,7 +1021,7 @@ def update_contact_nda_status(contact_id):
     """
     url = f"https://api.hubapi.com/crm/v3/objects/contacts/{contact_id}"
     payload = {"properties": {"nda_status": "Generated"}}
-    resp = requests.patch(url, headers=HEADERS_HS, json=payload)
+    resp = SESSION_HS.patch(url, json=payload)
     if resp.status_code != 200:
         send_error_email("Contact NDA Status Update Failed", resp.text)
 
@@ -568,45 +1033,132 @@ def update_company_nda_status(company_id):
         return
     url = f"https://api.hubapi.com/crm/v3/objects/companies/{company_id}"
     payload = {"properties": {"nda_status": "generated"}}
-    resp = requests.patch(url, headers=HEADERS_HS, json=payload)
+    resp = SESSION_HS.patch(url, json=payload)
     if resp.status_code != 200:
         send_error_email("Company NDA Status Update Failed", resp.text)
 
+# NDA status updates accumulate here and are flushed as batch-update calls
+# after the NDA run — one round-trip per 100 records instead of one PATCH
+# per contact/company. The single-object helpers above remain for one-off
+# corrections.
+_pending_nda_updates = {"contacts": [], "companies": []}
+_pending_nda_lock = threading.Lock()
+
+def queue_nda_status_update(object_type, object_id, properties):
+    """
+    Record a pending NDA status update for the post-run batch flush.
+    """
+    if not object_id:
+        return
+    with _pending_nda_lock:
+        _pending_nda_updates[object_type].append(
+            {"id": object_id, "properties": properties}
+        )
+
+def flush_nda_status_updates():
+    """
+    Send all queued NDA status updates through the batch-update endpoint.
+    """
+    with _pending_nda_lock:
+        pending = {k: v[:] for k, v in _pending_nda_updates.items()}
+        for v in _pending_nda_updates.values():
+            v.clear()
+    for object_type, inputs in pending.items():
+        if inputs:
+            hubspot_batch_update(object_type, inputs)
+
+# (parent_folder_id, subfolder_name) -> subfolder_id. The create lock keeps
+# concurrent deals for the same company from copying the template twice now
+# that all pipelines share one pool.
+_subfolder_cache = {}
+_subfolder_create_lock = threading.Lock()
+
 def get_or_create_subfolder(parent_folder_id, subfolder_name, template_folder_id):
     """
     Check if a subfolder exists in the parent folder; if not, create it by copying from template.
     Returns the subfolder ID.
     """
-    # Check if subfolder exists
-    url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{parent_folder_id}/children"
-    response = requests.get(url, headers=HEADERS_MS)
-    if response.status_code == 200:
-        folders = response.json().get("value", [])
-        for folder in folders:
-            if folder["name"] == subfolder_name:
-                return folder["id"]
-
-    # Create new subfolder by copying from template
-    copy_url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{template_folder_id}/copy"
-    payload = {
-        "parentReference": {"id": parent_folder_id},
-        "name": subfolder_name
-    }
-    copy_resp = requests.post(copy_url, headers=HEADERS_MS, json=payload)
-    if copy_resp.status_code not in [200, 202]:
-        print(f"❌ Failed to create subfolder '{subfolder_name}': {copy_resp.json()}")
-        return None
-
-    # Wait for copy to complete and get the new folder ID
-    time.sleep(2)
-    response = requests.get(url, headers=HEADERS_MS)
-    if response.status_code == 200:
-        folders = response.json().get("value", [])
-        for folder in folders:
-            if folder["name"] == subfolder_name:
-                return folder["id"]
-    
-    return None
+    key = (parent_folder_id, subfolder_name)
+    cached = _subfolder_cache.get(key)
+    if cached:
+        return cached
+
+    # Check if subfolder exists — memoized listing, so on reruns (where every
+    # client already has its subfolders) this costs no extra round trip.
+    existing_id = list_children(parent_folder_id).get(subfolder_name)
+    if existing_id:
+        _subfolder_cache[key] = existing_id
+        return existing_id
+
+    with _subfolder_create_lock:
+        # Another worker may have created it while we waited on the lock
+        cached = _subfolder_cache.get(key)
+        if cached:
+            return cached
+
+        # Create new subfolder by copying from template
+        copy_url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{template_folder_id}/copy"
+        payload = {
+            "parentReference": {"id": parent_folder_id},
+            "name": subfolder_name
+        }
+        copy_resp = SESSION_MS.post(copy_url, json=payload)
+        if copy_resp.status_code not in [200, 202]:
+            print(f"❌ Failed to create subfolder '{subfolder_name}': {safe_json(copy_resp)}")
+            return None
+        invalidate_children(parent_folder_id)
+
+        # Await the copy via its monitor URL — returns the new folder ID
+        # directly, so no re-listing (or fixed sleep) is needed.
+        new_id = wait_for_copy(copy_resp)
+        if new_id:
+            _subfolder_cache[key] = new_id
+        return new_id
+
+def get_or_create_plain_subfolder(parent_folder_id, subfolder_name):
+    """
+    Like get_or_create_subfolder, but creates an empty folder instead of
+    copying a template. Shares the same cache and create lock so concurrent
+    deals for one company can't race each other into a 409.
+    """
+    key = (parent_folder_id, subfolder_name)
+    cached = _subfolder_cache.get(key)
+    if cached:
+        return cached
+
+    existing_id = list_children(parent_folder_id).get(subfolder_name)
+    if existing_id:
+        _subfolder_cache[key] = existing_id
+        return existing_id
+
+    with _subfolder_create_lock:
+        cached = _subfolder_cache.get(key)
+        if cached:
+            return cached
+
+        create_url = (
+            f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{parent_folder_id}/children"
+        )
+        payload = {
+            "name": subfolder_name,
+            "folder": {},
+            "@microsoft.graph.conflictBehavior": "fail"
+        }
+        create_resp = SESSION_MS.post(create_url, json=payload)
+        if create_resp.status_code in (200, 201):
+            new_id = safe_json(create_resp)["id"]
+        elif create_resp.status_code == 409:
+            # Someone else (another run, or a manual create) got there first —
+            # treat it as existing and re-list.
+            invalidate_children(parent_folder_id)
+            new_id = list_children(parent_folder_id).get(subfolder_name)
+        else:
+            print(f"❌ Failed to create subfolder '{subfolder_name}': {safe_json(create_resp)}")
+            return None
+        invalidate_children(parent_folder_id)
+        if new_id:
+            _subfolder_cache[key] = new_id
+        return new_id
 
 def generate_nda_for_company(company):
     """
@@ -637,20 +1189,15 @@ def generate_nda_for_company(company):
 
     # Locate company folder in SharePoint
     parent_id = VENDORS_PARTNERS_FOLDER_ID if not allow_subfolders else CLIENTS_FOLDER_ID
-    url_fldr = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{parent_id}/children"
-    )
-    folders = requests.get(url_fldr, headers=HEADERS_MS).json().get("value", [])
-    company_folder = next((f for f in folders if f["name"] == company_name), None)
-    if not company_folder:
+    company_folder_id = list_children(parent_id).get(company_name)
+    if not company_folder_id:
         return
 
     # Determine target folder for NDA
     if allow_subfolders:
         # Create NDA subfolder if it doesn't exist
         nda_folder_id = get_or_create_subfolder(
-            company_folder["id"],
+            company_folder_id,
             "NDA",
             SUBFOLDER_01_NDA_ID
         )
@@ -659,46 +1206,21 @@ def generate_nda_for_company(company):
         target_folder_id = nda_folder_id
     else:
         # Vendors/partners: use company folder directly
-        target_folder_id = company_folder["id"]
-
-    date_str = datetime.now().strftime('%Y%m%d')
+        target_folder_id = company_folder_id
 
     # --- Fix: Mutual NDA naming for Prospects
     if contact_type == "prospect":
-        filename = f"AMZ Risk_Mutual NDA_{company_name}_{date_str}.docx"
+        filename = f"AMZ Risk_Mutual NDA_{company_name}_{TODAY_STAMP}.docx"
     else:
         contact_name = f"{contact.get('firstname','').strip()}_{contact.get('lastname','').strip()}"
-        filename = f"AMZ Risk_{contact_type.title()} NDA_{contact_name}_{date_str}.docx"
+        filename = f"AMZ Risk_{contact_type.title()} NDA_{contact_name}_{TODAY_STAMP}.docx"
 
-    copy_url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{template_id}/copy"
-    payload = {"parentReference": {"id": target_folder_id}, "name": filename}
-    copy_resp = requests.post(copy_url, headers=HEADERS_MS, json=payload)
-    if copy_resp.status_code not in [200, 202]:
-        send_error_email("NDA Copy Failed", copy_resp.text)
+    # Render from the cached template and upload straight to the target folder
+    file_data = get_template_bytes(template_id)
+    if file_data is None:
+        send_error_email("NDA Template Download Failed", f"Template missing for {company_name}")
         return
-
-    # Wait for copy to complete
-    time.sleep(5)
-    children_url = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{target_folder_id}/children"
-    )
-    items = requests.get(children_url, headers=HEADERS_MS).json().get("value", [])
-    copied_file = next((f for f in items if f["name"] == filename), None)
-    if not copied_file:
-        send_error_email("NDA Not Found", f"Copy succeeded but file not found for {company_name}")
-        return
-
-    # Download, replace placeholders, re-upload
-    download_url = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{copied_file['id']}/content"
-    )
-    file_data = requests.get(download_url, headers=HEADERS_MS).content
-    with open(filename, "wb") as f:
-        f.write(file_data)
-
-    doc = Document(filename)
+    doc = Document(io.BytesIO(file_data))
     placeholders = {
         "{legal_entity_name}": props.get("legal_entity_name", ""),
         "{address}":  props.get("address", ""),
@@ -711,68 +1233,97 @@ def generate_nda_for_company(company):
         "{jobtitle}":  contact.get("jobtitle", "")
     }
     replace_placeholders_in_document(doc, placeholders)
-    doc.save(filename)
+    out = io.BytesIO()
+    doc.save(out)
 
     # Upload filled NDA
     upload_url = (
         f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
         f"/drive/items/{target_folder_id}:/{filename}:/content"
     )
-    with open(filename, "rb") as f:
-        requests.put(upload_url, headers=HEADERS_MS, data=f)
+    SESSION_MS.put(upload_url, data=out.getvalue())
 
-    update_contact_nda_status(contact.get("id"))
-    update_company_nda_status(company_id)
+    queue_nda_status_update("contacts", contact.get("id"), {"nda_status": "Generated"})
+    queue_nda_status_update("companies", company_id, {"nda_status": "generated"})
     print(f"✅ NDA '{filename}' generated and uploaded for {company_name}!")
 
-# Run NDA generation
-companies_list = fetch_all_hubspot_data("companies", COMPANY_FIELDS)
-for comp in companies_list:
-    generate_nda_for_company(comp)
-print("✅ All NDAs processed!")
-
 # ─────────────────────────────────────────────────────────────────────────────
 # PROPOSAL GENERATION
 # ─────────────────────────────────────────────────────────────────────────────
 
+def hubspot_search(object_type, filters, properties):
+    """
+    Page through /crm/v3/objects/{object_type}/search so only records
+    matching the filters server-side come back, instead of fetching every
+    record and discarding most of them client-side.
+    """
+    url = f"https://api.hubapi.com/crm/v3/objects/{object_type}/search"
+    payload = {
+        "filterGroups": [{"filters": filters}],
+        "properties": properties,
+        "limit": 100
+    }
+    results = []
+    while True:
+        resp = SESSION_HS.post(url, json=payload)
+        if resp.status_code != 200:
+            print(f"❌ HubSpot search failed for {object_type}: {resp.text}")
+            return results
+        body = safe_json(resp)
+        results.extend(body.get("results", []))
+        after = body.get("paging", {}).get("next", {}).get("after")
+        if not after:
+            return results
+        payload["after"] = after
+
 def fetch_deals_for_proposal():
     """
-    Fetch HubSpot deals with properties needed for proposal generation.
+    Fetch only the deals whose proposal_status is 'generate', filtered
+    server-side via the search endpoint.
     """
-    url = (
-        "https://api.hubapi.com/crm/v3/objects/deals?properties="
-        "dealname,proposal_status,proposal___service_line,hubspot_owner_id"
+    return hubspot_search(
+        "deals",
+        [{"propertyName": "proposal_status", "operator": "EQ", "value": "generate"}],
+        ["dealname", "proposal_status", "proposal___service_line", "hubspot_owner_id"]
     )
-    resp = requests.get(url, headers=HEADERS_HS)
-    return resp.json().get("results", []) if resp.status_code == 200 else []
 
 def fetch_associated_company_id_for_deal(deal_id):
     """
     Given a HubSpot deal ID, return the associated company ID.
+    Served from the prefetched batch data when available.
     """
+    if str(deal_id) in _deal_company_cache:
+        ids = _deal_company_cache[str(deal_id)]
+        return ids[0] if ids else None
     url = f"https://api.hubapi.com/crm/v3/objects/deals/{deal_id}/associations/companies"
-    resp = requests.get(url, headers=HEADERS_HS)
-    results = resp.json().get("results", []) if resp.status_code == 200 else []
+    resp = SESSION_HS.get(url)
+    results = safe_json(resp).get("results", []) if resp.status_code == 200 else []
     return results[0]["id"] if results else None
 
 def fetch_company_data_for_proposal(company_id):
     """
     Fetch company properties (name, city, state, zip, address) for proposal.
+    Served from the prefetched batch data when available.
     """
+    if str(company_id) in _company_props_cache:
+        return _company_props_cache[str(company_id)]
     url = (
         f"https://api.hubapi.com/crm/v3/objects/companies/{company_id}?properties="
         "name,legal_entity_name,city,state_list,zip,address"
     )
-    resp = requests.get(url, headers=HEADERS_HS)
-    return resp.json().get("properties", {}) if resp.status_code == 200 else {}
+    resp = SESSION_HS.get(url)
+    return safe_json(resp).get("properties", {}) if resp.status_code == 200 else {}
 
 def fetch_primary_contact_for_proposal(company_id):
     """
     Fetch primary contact properties (firstname, lastname, email).
+    Served from the prefetched batch data when available.
     """
+    if str(company_id) in _company_contact_cache:
+        return _company_contact_cache[str(company_id)]
     url = f"https://api.hubapi.com/crm/v3/objects/companies/{company_id}/associations/contacts"
-    resp = requests.get(url, headers=HEADERS_HS)
-    results = resp.json().get("results", []) if resp.status_code == 200 else []
+    resp = SESSION_HS.get(url)
+    results = safe_json(resp).get("results", []) if resp.status_code == 200 else []
     if not results:
         return {}
     cid = results[0]["id"]
@@ -780,27 +1331,58 @@ def fetch_primary_contact_for_proposal(company_id):
         f"https://api.hubapi.com/crm/v3/objects/contacts/{cid}?properties="
         "firstname,lastname,email"
     )
-    contact_resp = requests.get(contact_url, headers=HEADERS_HS)
-    return contact_resp.json().get("properties", {}) if contact_resp.status_code == 200 else {}
+    contact_resp = SESSION_HS.get(contact_url)
+    return safe_json(contact_resp).get("properties", {}) if contact_resp.status_code == 200 else {}
 
+@lru_cache(maxsize=512)
 def fetch_owner_details(owner_id):
     """
     Fetch HubSpot owner first and last name, plus email.
+    A handful of reps own all the deals, so memoize per owner ID.
     """
     url = f"https://api.hubapi.com/crm/v3/owners/{owner_id}"
-    resp = requests.get(url, headers=HEADERS_HS)
+    resp = SESSION_HS.get(url)
     if resp.status_code == 200:
-        data = resp.json()
+        data = safe_json(resp)
         return f"{data.get('firstName','')} {data.get('lastName','')}".strip(), data.get("email", "")
     return "", ""
 
+# Status PATCHes don't gate the next document, so they run on a small
+# background pool and overlap with the following docx fill + upload.
+# flush_status_updates() drains the queue and surfaces any failures.
+_status_exec = ThreadPoolExecutor(max_workers=4)
+_status_futures = []
+_status_futures_lock = threading.Lock()
+
+def submit_status_update(fn, *args):
+    """
+    Run a status-update function on the background pool, keeping its future
+    so flush_status_updates() can report failures.
+    """
+    future = _status_exec.submit(fn, *args)
+    with _status_futures_lock:
+        _status_futures.append(future)
+
+def flush_status_updates():
+    """
+    Wait for all queued status updates and email any exceptions that escaped
+    the update functions themselves.
+    """
+    with _status_futures_lock:
+        pending, _status_futures[:] = _status_futures[:], []
+    for future in pending:
+        try:
+            future.result()
+        except Exception as exc:
+            send_error_email("Status Update Failed", str(exc))
+
 def update_proposal_status(deal_id):
     """
     Update a HubSpot deal's proposal_status to 'Generated'.
     """
     url = f"https://api.hubapi.com/crm/v3/objects/deals/{deal_id}"
     payload = {"properties": {"proposal_status": "Generated"}}
-    resp = requests.patch(url, headers=HEADERS_HS, json=payload)
+    resp = SESSION_HS.patch(url, json=payload)
     if resp.status_code != 200:
         send_error_email("Proposal Status Update Failed", resp.text)
 
@@ -810,9 +1392,7 @@ def proposal_exists_for_service_line(folder_id, company_name, service_line):
     regardless of the date suffix.
     """
     prefix = f"AMZ Risk_{company_name}_Proposal_{service_line}"
-    url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{folder_id}/children"
-    resp = requests.get(url, headers=HEADERS_MS)
-    return any(item["name"].startswith(prefix) for item in resp.json().get("value", []))
+    return any(name.startswith(prefix) for name in list_children(folder_id))
 
 PROPOSAL_TEMPLATES = {
     "Risk Assessment":             PROPOSAL_TEMPLATE_RISK_ASSESSMENT_ID,
@@ -822,28 +1402,24 @@ PROPOSAL_TEMPLATES = {
     "Global Threat Intelligence":  PROPOSAL_TEMPLATE_GLOBAL_THREAT_INTELLIGENCE_ID
 }
 
-def generate_proposal_for_deal(deal):
+def resolve_deal_context(deal, status_prop):
     """
-    For each deal, generate and upload a Proposal if proposal_status is 'generate'.
+    Resolve everything the proposal and SOW generators share per deal:
+    the status guard, associated company/contact, service lines and owner.
+    Returns a context dict, or None when the deal needs no work.
     """
-    status = deal["properties"].get("proposal_status", "").strip().lower()
+    status = deal["properties"].get(status_prop, "").strip().lower()
     if status != "generate":
-        return
+        return None
 
     deal_id = deal["id"]
     company_id = fetch_associated_company_id_for_deal(deal_id)
     if not company_id:
-        return
+        return None
     company = fetch_company_data_for_proposal(company_id)
     company_name = company.get("name", "Unknown Company")
     contact = fetch_primary_contact_for_proposal(company_id)
-
-
-    # Check if subfolders are allowed for this company
     allow_subfolders = client_folders.get(company_name, {}).get("allow_subfolders", True)
-    if not allow_subfolders:
-        print(f"⏩ Skipping Proposal generation for vendor/partner: {company_name}")
-        return
 
     raw = deal["properties"].get("proposal___service_line", [])
     service_lines = []
@@ -854,120 +1430,116 @@ def generate_proposal_for_deal(deal):
     if not service_lines:
         service_lines = ["Risk Assessment"]
 
-    owner_id = deal["properties"].get("hubspot_owner_id")
-    owner_name, owner_email = fetch_owner_details(owner_id)
+    owner_name, owner_email = fetch_owner_details(deal["properties"].get("hubspot_owner_id"))
+
+    return {
+        "deal_id":          deal_id,
+        "company":          company,
+        "company_name":     company_name,
+        "contact":          contact,
+        "allow_subfolders": allow_subfolders,
+        "service_lines":    service_lines,
+        "owner_name":       owner_name,
+        "owner_email":      owner_email
+    }
+
+def generate_proposal_for_deal(deal):
+    """
+    For each deal, generate and upload a Proposal if proposal_status is 'generate'.
+    """
+    ctx = resolve_deal_context(deal, "proposal_status")
+    if ctx is None:
+        return
+    if not ctx["allow_subfolders"]:
+        print(f"⏩ Skipping Proposal generation for vendor/partner: {ctx['company_name']}")
+        return
+
+    deal_id       = ctx["deal_id"]
+    company       = ctx["company"]
+    company_name  = ctx["company_name"]
+    contact       = ctx["contact"]
+    service_lines = ctx["service_lines"]
+    owner_name, owner_email = ctx["owner_name"], ctx["owner_email"]
 
     # Locate client folder
-    url_fldr = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{CLIENTS_FOLDER_ID}/children"
-    )
-    folders = requests.get(url_fldr, headers=HEADERS_MS).json().get("value", [])
-    client_folder = next((f for f in folders if f["name"] == company_name), None)
-    if not client_folder:
+    client_folder_id = list_children(CLIENTS_FOLDER_ID).get(company_name)
+    if not client_folder_id:
         return
 
     # Create Proposals subfolder if it doesn't exist
     proposals_folder_id = get_or_create_subfolder(
-        client_folder["id"],
+        client_folder_id,
         "Proposals",
         SUBFOLDER_02_PROPOSALS_ID
     )
     if not proposals_folder_id:
         return
 
-    children_url = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{proposals_folder_id}/children"
-    )
+    # Only the service line varies per iteration; everything else is fixed
+    # per deal, so build the dict once and overwrite that single key.
+    placeholders = {
+        "{proposal___service_line}": "",
+        "{today’s date}":            TODAY_ISO,
+        "{firstname}":               contact.get("firstname", ""),
+        "{lastname}":                contact.get("lastname", ""),
+        "{email}":                   contact.get("email", ""),
+        "{legal_entity_name}":       company.get("legal_entity_name", ""),
+        "{address}":                 company.get("address", ""),
+        "{city}":                    company.get("city", ""),
+        "{state_list}":              company.get("state_list", ""),
+        "{zip}":                     company.get("zip", ""),
+        "{amz_rep}":                 owner_name,
+        "{amz_rep_email}":           owner_email
+    }
+
     for service_line in service_lines:
         filename = (
             f"AMZ Risk_{company_name}_Proposal_{service_line}_"
-            f"{datetime.now().strftime('%Y%m%d')}.docx"
+            f"{TODAY_STAMP}.docx"
         )
         if proposal_exists_for_service_line(proposals_folder_id, company_name, service_line):
             print(f"⏩ Skipping duplicate proposal for {company_name} - {service_line}")    
             continue
 
         template_id = PROPOSAL_TEMPLATES.get(service_line, PROPOSAL_TEMPLATES["Risk Assessment"])
-        copy_url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{template_id}/copy"
-        copy_resp = requests.post(
-            copy_url,
-            headers=HEADERS_MS,
-            json={"parentReference": {"id": proposals_folder_id}, "name": filename}
-        )
-        if copy_resp.status_code not in (200, 202):
-            send_error_email("Proposal Copy Failed", copy_resp.text)
+        data = get_template_bytes(template_id)
+        if data is None:
+            send_error_email("Proposal Template Download Failed", f"Template missing for {service_line}")
             continue
 
-        # Wait for copy to complete
-        for _ in range(10):
-            items = requests.get(children_url, headers=HEADERS_MS).json().get("value", [])
-            if any(item["name"] == filename for item in items):
-                break
-            time.sleep(2)
-        else:
-            send_error_email("Proposal Copy Timeout", f"Copy timed out for {filename}")
-            continue
+        placeholders["{proposal___service_line}"] = service_line
 
-        copied = next(item for item in items if item["name"] == filename)
-        download_url = (
-            f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-            f"/drive/items/{copied['id']}/content"
-        )
-        data = requests.get(download_url, headers=HEADERS_MS).content
-        with open(filename, "wb") as fd:
-            fd.write(data)
-
-        placeholders = {
-            "{proposal___service_line}": service_line,
-            "{today’s date}":            datetime.now().strftime("%Y-%m-%d"),
-            "{firstname}":               contact.get("firstname", ""),
-            "{lastname}":                contact.get("lastname", ""),
-            "{email}":                   contact.get("email", ""),
-            "{legal_entity_name}":       company.get("legal_entity_name", ""),
-            "{address}":                 company.get("address", ""),
-            "{city}":                    company.get("city", ""),
-            "{state_list}":              company.get("state_list", ""),
-            "{zip}":                     company.get("zip", ""),
-            "{amz_rep}":                 owner_name,
-            "{amz_rep_email}":           owner_email
-        }
-
-        doc = Document(filename)
+        doc = Document(io.BytesIO(data))
         replace_placeholders_in_document(doc, placeholders)
-        doc.save(filename)
+        out = io.BytesIO()
+        doc.save(out)
 
         upload_url = (
             f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
             f"/drive/items/{proposals_folder_id}:/{filename}:/content"
         )
-        with open(filename, "rb") as fd:
-            requests.put(upload_url, headers=HEADERS_MS, data=fd)
+        SESSION_MS.put(upload_url, data=out.getvalue())
+        # Drop the memoized listing so duplicate probes from other deals for
+        # this company see the file we just uploaded.
+        invalidate_children(proposals_folder_id)
 
-        update_proposal_status(deal_id)
+        submit_status_update(update_proposal_status, deal_id)
         print(f"✅ Proposal '{filename}' uploaded for {company_name}!")
 
-# Run proposal generation
-deals_list = fetch_deals_for_proposal()
-for deal in deals_list:
-    generate_proposal_for_deal(deal)
-print("✅ All proposals processed!")
-
 # ─────────────────────────────────────────────────────────────────────────────
 # SOW GENERATION
 # ─────────────────────────────────────────────────────────────────────────────
 
 def fetch_deals_for_sow():
     """
-    Fetch HubSpot deals with properties needed for SOW generation.
+    Fetch only the deals whose sow_status is 'generate', filtered
+    server-side via the search endpoint.
     """
-    url = (
-        "https://api.hubapi.com/crm/v3/objects/deals?properties="
-        "dealname,sow_status,proposal___service_line,hubspot_owner_id"
+    return hubspot_search(
+        "deals",
+        [{"propertyName": "sow_status", "operator": "EQ", "value": "generate"}],
+        ["dealname", "sow_status", "proposal___service_line", "hubspot_owner_id"]
     )
-    resp = requests.get(url, headers=HEADERS_HS)
-    return resp.json().get("results", []) if resp.status_code == 200 else []
 
 def update_sow_status(deal_id):
     """
@@ -975,7 +1547,7 @@ def update_sow_status(deal_id):
     """
     url = f"https://api.hubapi.com/crm/v3/objects/deals/{deal_id}"
     payload = {"properties": {"sow_status": "Generated"}}
-    resp = requests.patch(url, headers=HEADERS_HS, json=payload)
+    resp = SESSION_HS.patch(url, json=payload)
     if resp.status_code != 200:
         send_error_email("SOW Status Update Failed", resp.text)
 
@@ -992,178 +1564,127 @@ def generate_sow_for_deal(deal):
     For each deal, generate and upload a SOW if needed.
     Only runs if sow_status is 'Generate', and updates the status to 'Generated' after creation.
     """
-    # Only proceed if SOW status is "Generate"
-    status = deal["properties"].get("sow_status", "").strip().lower()
-    if status != "generate":
+    ctx = resolve_deal_context(deal, "sow_status")
+    if ctx is None:
         return
-
-    deal_id = deal["id"]
-    company_id = fetch_associated_company_id_for_deal(deal_id)
-    if not company_id:
+    if not ctx["allow_subfolders"]:
+        print(f"⏩ Skipping SOW generation for vendor/partner: {ctx['company_name']}")
         return
 
-    company = fetch_company_data_for_proposal(company_id)
-    company_name = company.get("name", "Unknown Company")
-    contact = fetch_primary_contact_for_proposal(company_id)
+    deal_id       = ctx["deal_id"]
+    company       = ctx["company"]
+    company_name  = ctx["company_name"]
+    contact       = ctx["contact"]
+    service_lines = ctx["service_lines"]
+    owner_name, owner_email = ctx["owner_name"], ctx["owner_email"]
 
-    # Check if subfolders are allowed for this company
-    allow_subfolders = client_folders.get(company_name, {}).get("allow_subfolders", True)
-    if not allow_subfolders:
-        print(f"⏩ Skipping SOW generation for vendor/partner: {company_name}")
+    # Locate client folder (memoized listing)
+    client_folder_id = list_children(CLIENTS_FOLDER_ID).get(company_name)
+    if not client_folder_id:
         return
 
-    raw = deal["properties"].get("proposal___service_line", [])
-    service_lines = []
-    if isinstance(raw, list):
-        service_lines = [opt.get("value") for opt in raw if isinstance(opt, dict) and opt.get("value")]
-    elif isinstance(raw, str) and raw:
-        service_lines = [s.strip() for s in raw.split(';') if s.strip()]
-    if not service_lines:
-        service_lines = ["Risk Assessment"]
-
-    owner_id = deal["properties"].get("hubspot_owner_id")
-    owner_name, owner_email = fetch_owner_details(owner_id)
-
-    # Locate client folder
-    url_fldr = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{CLIENTS_FOLDER_ID}/children"
-    )
-    folders = requests.get(url_fldr, headers=HEADERS_MS).json().get("value", [])
-    client_folder = next((f for f in folders if f["name"] == company_name), None)
-    if not client_folder:
+    # Locate or create SOW subfolder on demand (removing number from folder name)
+    sow_folder_id = get_or_create_plain_subfolder(client_folder_id, "SOWs")
+    if not sow_folder_id:
+        send_error_email("SOW Subfolder Creation Failed", f"Could not create SOWs folder for {company_name}")
         return
 
-    # Locate or create SOW subfolder on demand (removing number from folder name)
-    url_sub = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{client_folder['id']}/children"
-    )
-    subfolders = requests.get(url_sub, headers=HEADERS_MS).json().get("value", [])
-    sow_folder = next((f for f in subfolders if f["name"] == "SOWs"), None)
+    # One listing per deal; track our own uploads so later service lines
+    # in the same loop see them without re-listing the folder.
+    existing = set(list_children(sow_folder_id))
 
-    if not sow_folder:
-        # Create 'SOWs' subfolder only if it doesn't exist
-        create_folder_url = (
-            f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{client_folder['id']}/children"
-        )
-        folder_payload = {
-            "name": "SOWs",
-            "folder": {},
-            "@microsoft.graph.conflictBehavior": "fail"
-        }
-        create_resp = requests.post(create_folder_url, headers=HEADERS_MS, json=folder_payload)
-        if create_resp.status_code in (200, 201):
-            sow_folder = create_resp.json()
-        else:
-            send_error_email("SOW Subfolder Creation Failed", create_resp.text)
-            return
+    # Only the service line varies per iteration; everything else is fixed
+    # per deal, so build the dict once and overwrite that single key.
+    placeholders = {
+        "{proposal___service_line}": "",
+        "{today's date}":            TODAY_ISO,
+        "{firstname}":               contact.get("firstname", ""),
+        "{lastname}":                contact.get("lastname", ""),
+        "{jobtitle}":                contact.get("jobtitle", ""),
+        "{email}":                   contact.get("email", ""),
+        "{legal_entity_name}":       company.get("legal_entity_name", ""),
+        "{address}":                 company.get("address", ""),
+        "{city}":                    company.get("city", ""),
+        "{state_list}":              company.get("state_list", ""),
+        "{zip}":                     company.get("zip", ""),
+        "{amz_rep}":                 owner_name,
+        "{amz_rep_email}":           owner_email
+    }
 
-    children_url = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{sow_folder['id']}/children"
-    )
     for service_line in service_lines:
         # NEW NAMING CONVENTION: AMZ Risk_SOW_[CompanyName]_[ServiceLine]_[Date].docx
         filename = (
-            f"AMZ Risk_SOW_{company_name}_{service_line}_{datetime.now().strftime('%Y%m%d')}.docx"
+            f"AMZ Risk_SOW_{company_name}_{service_line}_{TODAY_STAMP}.docx"
         )
-        if any(item["name"] == filename for item in requests.get(children_url, headers=HEADERS_MS).json().get("value", [])):
+        if filename in existing:
             continue
 
         template_id = SOW_TEMPLATES.get(service_line)
         if not template_id:
             continue
 
-        copy_url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{template_id}/copy"
-        resp = requests.post(
-            copy_url,
-            headers=HEADERS_MS,
-            json={"parentReference": {"id": sow_folder['id']}, "name": filename}
-        )
-        if resp.status_code not in (200, 202):
-            send_error_email("SOW Copy Failed", resp.json())
-            continue
-
-        # Wait for copy
-        for _ in range(10):
-            items = requests.get(children_url, headers=HEADERS_MS).json().get("value", [])
-            if any(i["name"] == filename for i in items):
-                break
-            time.sleep(2)
-        else:
-            send_error_email("SOW Copy Timeout", f"Copy timed out for {filename}")
+        data = get_template_bytes(template_id)
+        if data is None:
+            send_error_email("SOW Template Download Failed", f"Template missing for {service_line}")
             continue
 
-        copied = next(i for i in items if i["name"] == filename)
-        download_url = (
-            f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-            f"/drive/items/{copied['id']}/content"
-        )
-        data = requests.get(download_url, headers=HEADERS_MS).content
-        with open(filename, "wb") as fd:
-            fd.write(data)
-
-        placeholders = {
-            "{proposal___service_line}": service_line,
-            "{today's date}":            datetime.now().strftime("%Y-%m-%d"),
-            "{firstname}":               contact.get("firstname", ""),
-            "{lastname}":                contact.get("lastname", ""),
-            "{jobtitle}":                contact.get("jobtitle", ""),
-            "{email}":                   contact.get("email", ""),
-            "{legal_entity_name}":       company.get("legal_entity_name", ""),
-            "{address}":                 company.get("address", ""),
-            "{city}":                    company.get("city", ""),
-            "{state_list}":              company.get("state_list", ""),
-            "{zip}":                     company.get("zip", ""),
-            "{amz_rep}":                 owner_name,
-            "{amz_rep_email}":           owner_email
-        }
+        placeholders["{proposal___service_line}"] = service_line
 
-        doc = Document(filename)
+        doc = Document(io.BytesIO(data))
         replace_placeholders_in_document(doc, placeholders)
-        doc.save(filename)
+        out = io.BytesIO()
+        doc.save(out)
 
         upload_url = (
             f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-            f"/drive/items/{sow_folder['id']}:/{filename}:/content"
+            f"/drive/items/{sow_folder_id}:/{filename}:/content"
         )
-        with open(filename, "rb") as fd:
-            requests.put(upload_url, headers=HEADERS_MS, data=fd)
+        SESSION_MS.put(upload_url, data=out.getvalue())
+        existing.add(filename)
+        invalidate_children(sow_folder_id)
 
         # Set SOW status to "Generated" after successful creation
-        update_sow_status(deal_id)
+        submit_status_update(update_sow_status, deal_id)
         print(f"✅ SOW '{filename}' uploaded for {company_name}!")
 
 
-# Run SOW generation
-deals_for_sow = fetch_deals_for_sow()
-for deal in deals_for_sow:
-    generate_sow_for_deal(deal)
-print("✅ All SOWs processed!")
-
 # ─────────────────────────────────────────────────────────────────────────────
 # MSA GENERATION
 # ─────────────────────────────────────────────────────────────────────────────
 
 def fetch_companies_for_msa():
     """
-    Fetch HubSpot companies with msa_status.
+    Fetch all HubSpot companies with msa_status, paginating at 100 per page —
+    the unpaginated endpoint silently stops after the first page.
     """
-    url = (
-        "https://api.hubapi.com/crm/v3/objects/companies?properties="
-        "name,city,state_list,zip,address,msa_status"
+    base_url = (
+        "https://api.hubapi.com/crm/v3/objects/companies?limit=100&properties="
+        "name,legal_entity_name,city,state_list,zip,address,msa_status"
     )
-    resp = requests.get(url, headers=HEADERS_HS)
-    return resp.json().get("results", []) if resp.status_code == 200 else []
+    url = base_url
+    results = []
+    while True:
+        resp = SESSION_HS.get(url)
+        if resp.status_code != 200:
+            print(f"❌ Failed to fetch companies for MSA: {resp.text}")
+            return results
+        body = safe_json(resp)
+        results.extend(body.get("results", []))
+        after = body.get("paging", {}).get("next", {}).get("after")
+        if not after:
+            return results
+        url = f"{base_url}&after={after}"
 
 def fetch_primary_contact_for_msa(company_id):
     """
     Fetch primary contact properties for MSA (firstname, lastname, email, jobtitle, msa_status).
+    Served from the prefetched batch data when available.
     """
+    if str(company_id) in _company_msa_contact_cache:
+        return _company_msa_contact_cache[str(company_id)]
     url = f"https://api.hubapi.com/crm/v3/objects/companies/{company_id}/associations/contacts"
-    resp = requests.get(url, headers=HEADERS_HS)
-    results = resp.json().get("results", []) if resp.status_code == 200 else []
+    resp = SESSION_HS.get(url)
+    results = safe_json(resp).get("results", []) if resp.status_code == 200 else []
     if not results:
         return {}
     cid = results[0]["id"]
@@ -1171,9 +1692,9 @@ def fetch_primary_contact_for_msa(company_id):
         f"https://api.hubapi.com/crm/v3/objects/contacts/{cid}?properties="
         "firstname,lastname,email,jobtitle,msa_status"
     )
-    contact_resp = requests.get(contact_url, headers=HEADERS_HS)
+    contact_resp = SESSION_HS.get(contact_url)
     if contact_resp.status_code == 200:
-        props = contact_resp.json().get("properties", {})
+        props = safe_json(contact_resp).get("properties", {})
         props["id"] = cid
         return props
     return {}
@@ -1185,9 +1706,8 @@ def update_contact_msa_status(contact_id):
     if not contact_id:
         return
     url = f"https://api.hubapi.com/crm/v3/objects/contacts/{contact_id}"
-    resp = requests.patch(
+    resp = SESSION_HS.patch(
         url,
-        headers=HEADERS_HS,
         json={"properties": {"msa_status": "Generated"}}
     )
     if resp.status_code != 200:
@@ -1200,9 +1720,8 @@ def update_company_msa_status(company_id):
     if not company_id:
         return
     url = f"https://api.hubapi.com/crm/v3/objects/companies/{company_id}"
-    resp = requests.patch(
+    resp = SESSION_HS.patch(
         url,
-        headers=HEADERS_HS,
         json={"properties": {"msa_status": "generated"}}
     )
     if resp.status_code != 200:
@@ -1210,11 +1729,10 @@ def update_company_msa_status(company_id):
 
 def msa_file_exists(folder_id, prefix):
     """
-    Check if an MSA file already exists (prefix match) in the given folder.
+    Check if an MSA file already exists (prefix match) in the given folder,
+    using the memoized children listing.
     """
-    url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{folder_id}/children"
-    resp = requests.get(url, headers=HEADERS_MS)
-    return any(f["name"].startswith(prefix) for f in resp.json().get("value", []))
+    return any(name.startswith(prefix) for name in list_children(folder_id))
 
 def generate_msa_for_company(company):
     """
@@ -1239,20 +1757,15 @@ def generate_msa_for_company(company):
 
     # Locate company folder in SharePoint (still based on Company Name)
     parent_id = VENDORS_PARTNERS_FOLDER_ID if not allow_subfolders else CLIENTS_FOLDER_ID
-    url_fldr = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{parent_id}/children"
-    )
-    folders = requests.get(url_fldr, headers=HEADERS_MS).json().get("value", [])
-    company_folder = next((f for f in folders if f["name"] == company_name), None)
-    if not company_folder:
+    company_folder_id = list_children(parent_id).get(company_name)
+    if not company_folder_id:
         send_error_email("MSA Error", f"Folder not found for {company_name}")
         return
 
     # Determine target folder for MSA
     if allow_subfolders:
         msa_folder_id = get_or_create_subfolder(
-            company_folder["id"],
+            company_folder_id,
             "MSAs",
             SUBFOLDER_05_MSAS_ID
         )
@@ -1261,48 +1774,28 @@ def generate_msa_for_company(company):
             return
         target_folder_id = msa_folder_id
     else:
-        target_folder_id = company_folder["id"]
+        target_folder_id = company_folder_id
 
     # Use legal_entity_name for file naming
     prefix = f"AMZ Risk_MSA_{legal_entity_name}"
-    date_str = datetime.now().strftime('%Y%m%d')
-    filename = f"{prefix}_{date_str}.docx"
+    filename = f"{prefix}_{TODAY_STAMP}.docx"
 
-    # Check if file already exists
-    children_url = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{target_folder_id}/children"
-    )
-    files = requests.get(children_url, headers=HEADERS_MS).json().get("value", [])
-    if any(f["name"] == filename for f in files):
+    # Single existence probe: the prefix match catches MSAs generated on an
+    # earlier date too, so no second listing is needed.
+    if msa_file_exists(target_folder_id, prefix):
         # Even if it already exists, ensure both are marked as Generated
-        update_contact_msa_status(contact.get("id"))
-        update_company_msa_status(company_id)
+        submit_status_update(update_contact_msa_status, contact.get("id"))
+        submit_status_update(update_company_msa_status, company_id)
         return
 
-    # Copy template to target folder
-    copy_url = f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}/drive/items/{MSA_TEMPLATE_ID}/copy"
-    payload = {"parentReference": {"id": target_folder_id}, "name": filename}
-    copy_resp = requests.post(copy_url, headers=HEADERS_MS, json=payload)
-    if copy_resp.status_code not in [200, 202]:
-        send_error_email("MSA Copy Failed", copy_resp.text)
-        return
-    time.sleep(5)
-    files = requests.get(children_url, headers=HEADERS_MS).json().get("value", [])
-    new_file = next((f for f in files if f["name"] == filename), None)
-    if not new_file:
-        send_error_email("MSA Missing", f"Copied MSA not found for {legal_entity_name}")
+    # Render from the cached template and upload straight to the target folder
+    file_data = get_template_bytes(MSA_TEMPLATE_ID)
+    if file_data is None:
+        send_error_email("MSA Template Download Failed", f"Template missing for {legal_entity_name}")
         return
-    download_url = (
-        f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
-        f"/drive/items/{new_file['id']}/content"
-    )
-    file_data = requests.get(download_url, headers=HEADERS_MS).content
-    with open(filename, "wb") as f:
-        f.write(file_data)
-    doc = Document(filename)
+    doc = Document(io.BytesIO(file_data))
     replacements = {
-        "{date}":       datetime.now().strftime("%Y-%m-%d"),
+        "{date}":       TODAY_ISO,
         "{legal_entity_name}": legal_entity_name,
         "{address}":    props.get("address", ""),
         "{city}":       props.get("city", ""),
@@ -1314,35 +1807,53 @@ def generate_msa_for_company(company):
         "{jobtitle}":   contact.get("jobtitle", "")
     }
     replace_placeholders_in_document(doc, replacements)
-    doc.save(filename)
+    out = io.BytesIO()
+    doc.save(out)
     upload_url = (
         f"{GRAPH_API_BASE_URL}/sites/{SHAREPOINT_SITE_ID}"
         f"/drive/items/{target_folder_id}:/{filename}:/content"
     )
-    with open(filename, "rb") as f:
-        requests.put(upload_url, headers=HEADERS_MS, data=f)
+    SESSION_MS.put(upload_url, data=out.getvalue())
     # IMPORTANT: Update BOTH statuses after successful generation
-    update_contact_msa_status(contact.get("id"))
-    update_company_msa_status(company_id)
+    submit_status_update(update_contact_msa_status, contact.get("id"))
+    submit_status_update(update_company_msa_status, company_id)
     print(f"✅ MSA '{filename}' created and uploaded for {legal_entity_name}!")
 
-# Run MSA generation
+# ─────────────────────────────────────────────────────────────────────────────
+# RUN ALL DOCUMENT PIPELINES
+# ─────────────────────────────────────────────────────────────────────────────
+
+# One shared pool for NDA, proposal, SOW and MSA jobs: the four pipelines
+# share no data, so their network I/O overlaps instead of each pipeline
+# draining before the next starts. The company list from the Excel refresh
+# is reused for NDAs instead of re-paginating.
+deals_list        = fetch_deals_for_proposal()
+deals_for_sow     = fetch_deals_for_sow()
 companies_for_msa = fetch_companies_for_msa()
-for comp in companies_for_msa:
-    generate_msa_for_company(comp)
-print("✅ All MSAs processed!")
+prefetch_proposal_data(deals_list + deals_for_sow)
+prefetch_msa_data(companies_for_msa)
+
+_jobs = (
+    [(generate_nda_for_company, c)      for c in companies]
+    + [(generate_proposal_for_deal, d)  for d in deals_list]
+    + [(generate_sow_for_deal, d)       for d in deals_for_sow]
+    + [(generate_msa_for_company, c)    for c in companies_for_msa]
+)
+with ThreadPoolExecutor(max_workers=10) as executor:
+    _futures = [executor.submit(fn, arg) for fn, arg in _jobs]
+    # Surface failures without letting one job abort the batch
+    for _future in _futures:
+        try:
+            _future.result()
+        except Exception as exc:
+            send_error_email("Document Generation Failed", str(exc))
+flush_nda_status_updates()
+flush_status_updates()
+print("✅ All documents processed!")
 
 # ─────────────────────────────────────────────────────────────────────────────
 # MAIN EXECUTION
 # ─────────────────────────────────────────────────────────────────────────────
 
-# In the main execution, ensure both NDA and MSA generation are called for each company
-companies_list = fetch_all_hubspot_data("companies", COMPANY_FIELDS)
-
-for comp in companies_list:
-    generate_nda_for_company(comp)
-    generate_msa_for_company(comp)
-print("✅ All NDAs and MSAs processed!")
-
 # Sync Closed-Won deals to Asana
 sync_closed_won_deals_to_asana()